@@ -1,10 +1,16 @@
 import sys
 import re
-from dataclasses import dataclass
+import functools
+from typing import NamedTuple
 
 from pyrenode.pyrenode import Pyrenode
 
 
+class Result(NamedTuple):
+    text: str = ''
+    match: object = None
+
+
 def connect_renode(
         spawn_renode: bool = True,
         telnet_port: int = 4567,
@@ -28,34 +34,43 @@ def tell_renode(string: str, newline: bool = True):
     Pyrenode().write_to_renode(string, newline)
 
 
+def tell_renode_many(*lines: str):
+    Pyrenode().write_to_renode('\n'.join(lines))
+
+
 def read_until(string: str, timeout: float = 1.):
     pyrenode = Pyrenode()
     if pyrenode.telnet_connection is None:
         return
-    return Pyrenode.escape_ansi(pyrenode.telnet_connection.read_until(
-        string.encode(),
-        timeout
-    ).decode())
-
+    data = pyrenode.read_telnet_until(string.encode(), timeout)
+    return Pyrenode.escape_ansi_bytes(data).decode(errors='replace')
 
-def expect_cli(string: str, timeout: float = 15.):
-    @dataclass
-    class Result:
-        text: str = ''
-        match: object = None
 
+@functools.lru_cache(maxsize=128)
+def _compile_prompt(string: str):
     expected = re.escape(string).replace('\n', '\r*\n\r*')
-    _, matches, data = Pyrenode().telnet_connection.expect(
-        [expected.encode()],
-        timeout
+    return re.compile(expected.encode())
+
+
+def expect_cli(string: str, timeout: float = 15.):
+    # prompt lines are joined by a single newline each, so a match spans
+    # exactly as many newlines as the prompt
+    matches, data = Pyrenode().expect_telnet(
+        _compile_prompt(string),
+        timeout,
+        newlines=string.count('\n')
+    )
+    return Result(
+        Pyrenode.escape_ansi_bytes(data).decode(errors='replace'),
+        matches
     )
-    return Result(Pyrenode.escape_ansi(data.decode()), matches)
 
 
 def _bind_function(name: str):
-    def func(*args, **kwargs):
-        message = Pyrenode().run_robot_keyword(name, *args, **kwargs)
-        return message
+    # the keyword name and the bound method are resolved once, as locals,
+    # instead of looking up the Pyrenode singleton on every call
+    def func(*args, _run=Pyrenode().run_robot_keyword, _name=name, **kwargs):
+        return _run(_name, *args, **kwargs)
     return func
 
 
@@ -0,0 +1,128 @@
+from pathlib import Path
+import os
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+_EVENT_HEADER = struct.Struct('iIII')
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.ENOSYS, 'inotify is available only on Linux')
+    if _libc is None:
+        _libc = ctypes.CDLL(
+            ctypes.util.find_library('c') or 'libc.so.6',
+            use_errno=True
+        )
+    return _libc
+
+
+def _check(result: int) -> int:
+    if result < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return result
+
+
+def _wait_for_event(fd: int, wd: int, name: bytes, deadline: float) -> bool:
+    """
+    Waits for an event concerning the given name in the watched directory.
+
+    Parameters
+    ----------
+    fd : int
+        inotify file descriptor
+    wd : int
+        Watch descriptor of the directory
+    name : bytes
+        Name of the awaited directory entry
+    deadline : float
+        Time (as returned by `time.perf_counter`) after which waiting stops
+
+    Returns
+    -------
+    bool :
+        True if the event occurred, False on timeout
+    """
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        readable, _, _ = select.select([fd], [], [], remaining)
+        if not readable:
+            return False
+        events = os.read(fd, 4096)
+        offset = 0
+        while offset < len(events):
+            event_wd, _, _, length = _EVENT_HEADER.unpack_from(events, offset)
+            offset += _EVENT_HEADER.size
+            event_name = events[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if event_wd == wd and event_name == name:
+                return True
+
+
+def wait_for_file(path: Path, timeout: float) -> bool:
+    """
+    Waits until the file is written and closed, or moved into place, using
+    inotify instead of polling the filesystem. If the parent directory does
+    not exist yet, its creation is awaited first.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the awaited file, at least its grandparent directory has to
+        exist
+    timeout : float
+        Timeout in seconds
+
+    Returns
+    -------
+    bool :
+        True if the file is present, False on timeout
+
+    Raises
+    ------
+    OSError :
+        If inotify is not available or the directory cannot be watched
+    """
+    libc = _get_libc()
+    deadline = time.perf_counter() + timeout
+    fd = _check(libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC))
+    try:
+        directory = path.parent
+        if not directory.exists():
+            wd = _check(libc.inotify_add_watch(
+                fd,
+                os.fsencode(directory.parent),
+                IN_CREATE | IN_MOVED_TO
+            ))
+            # the directory may have been created before the watch was added
+            if (not directory.exists() and
+                    not _wait_for_event(
+                        fd, wd, os.fsencode(directory.name), deadline)):
+                return False
+
+        wd = _check(libc.inotify_add_watch(
+            fd,
+            os.fsencode(directory),
+            IN_CLOSE_WRITE | IN_MOVED_TO
+        ))
+        # the file may have been written before the watch was added
+        if path.exists():
+            return True
+
+        return _wait_for_event(fd, wd, os.fsencode(path.name), deadline)
+    finally:
+        os.close(fd)
@@ -1,23 +1,40 @@
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Tuple, Pattern, Match
 from pathlib import Path
 import os
 import re
+import codecs
 import time
-import shutil
-import psutil
+import socket
+import select
+import selectors
 import signal
 import logging
 import tempfile
-import telnetlib
 import traceback
 import threading
 import subprocess
-import robot.libraries.Remote as robot_remote
 
+from pyrenode.inotify import wait_for_file
 from pyrenode.singleton import Singleton
 
 
 DEFAULT_LOG_PATH = Path(f'{tempfile.gettempdir()}/renode_log.txt')
+PIPE_SIZE = 1 << 20
+LOG_BUFFER_SIZE = 32 << 20
+MONITOR_PROMPT = b'(monitor)'
+_ANSI_ESCAPE_RE = re.compile(r'(?:\x1B[@-_]|[\x80-\x9F])[0-?]*[ -/]*[@-~]')
+# the same pattern for UTF-8 encoded data, C1 controls are encoded as C2 80-9F
+_ANSI_ESCAPE_BYTES_RE = re.compile(
+    rb'(?:\x1B[@-_]|\xC2[\x80-\x9F])[0-?]*[ -/]*[@-~]'
+)
+# telnet option negotiation (WILL/WONT/DO/DONT), subnegotiation and other
+# commands
+_TELNET_COMMAND_RE = re.compile(
+    rb'\xff(?:[\xfb-\xfe].|\xfa.*?\xff\xf0|[\xf0-\xf9\xff])',
+    re.DOTALL
+)
+# a telnet command cut off at the end of received data
+_TELNET_PARTIAL_RE = re.compile(rb'\xff(?:[\xfb-\xfe]?|\xfa.*)\Z', re.DOTALL)
 FORMAT = '[%(asctime)-15s %(filename)s:%(lineno)s] [%(levelname)s] %(message)s'
 logging.basicConfig(format=FORMAT)
 
@@ -36,6 +53,32 @@ class Pyrenode(metaclass=Singleton):
     provides an API for it.
     """
 
+    __slots__ = (
+        'telnet_port',
+        'robot_port',
+        'renode_path',
+        'renode_log_path',
+        'read_renode_stdout',
+        'renode_process',
+        'telnet_connection',
+        'telnet_buffer',
+        'telnet_partial',
+        'robot_connection',
+        'keywords',
+        '_keyword_set',
+        'subprocess_pids',
+        'renode_pid',
+        'initialized',
+        'renode_pipe_in',
+        'renode_pipe_out',
+        'log_buffer',
+        'log_reader_thread',
+        'log_reader_wakeup',
+    )
+
+    # (PATH, resolved executable) of the last Renode lookup
+    _cached_executable: Tuple[Optional[str], Optional[str]] = (None, None)
+
     def __init__(self):
         """
         Initializes class variables
@@ -48,8 +91,11 @@ class Pyrenode(metaclass=Singleton):
 
         self.renode_process = None
         self.telnet_connection = None
+        self.telnet_buffer = bytearray()
+        self.telnet_partial = b''
         self.robot_connection = None
         self.keywords = []
+        self._keyword_set = frozenset()
         self.subprocess_pids = []
         self.renode_pid = None
 
@@ -58,9 +104,9 @@ class Pyrenode(metaclass=Singleton):
         self.renode_pipe_in = None
         self.renode_pipe_out = None
 
-        self.log_buffer = ''
+        self.log_buffer = bytearray()
         self.log_reader_thread = None
-        self.log_reader_run = False
+        self.log_reader_wakeup = None
 
     def __enter__(self):
         return self
@@ -131,8 +177,8 @@ class Pyrenode(metaclass=Singleton):
                     timeout=timeout,
                     retry_time=retry_time
                 )
-            self.write_to_renode(' ')
-            self.write_to_renode(f'logFile @{self.renode_log_path}')
+            # both bootstrap commands go out in a single write
+            self.write_to_renode(f' \nlogFile @{self.renode_log_path}')
 
             self.initialized = True
             logging.info('initalized')
@@ -150,44 +196,46 @@ class Pyrenode(metaclass=Singleton):
         logging.info('starting cleanup')
         if self.renode_process is not None:
 
-            self.write_to_renode('q')
+            if self.renode_process.poll() is None:
+                try:
+                    self.write_to_renode('q')
+                except OSError as e:
+                    # Renode has exited in the meantime
+                    logging.debug(f'cannot send quit command: {e}')
 
-            proc = None
             # wait for Renode process to exit
-            try:
-                proc = psutil.Process(self.renode_process.pid)
-            except psutil.NoSuchProcess:
-                # Renode already closed
-                pass
-            except KeyError:
-                # psutil may be unloaded at this moment if cleanup is called
-                # from __del__
-                logging.info(
-                    f'cannot access Renode process, error: '
-                    f'{traceback.format_exc()}'
+            if not self._wait_for_exit(self.renode_process, timeout=30):
+                logging.error('Renode did not close properly after 30s')
+                self.renode_process.terminate()
+
+            # decoding the whole log is not free, skip it unless it is shown
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(
+                    'Renode logs:\n%s',
+                    self.log_buffer.decode(errors='replace')
                 )
-                # give Renode 10 secs for cleanup end exit
-                time.sleep(10)
-                pass
-
-            if proc is not None:
-                status = proc.status()
-                start_time = time.perf_counter()
-                while status != psutil.STATUS_ZOMBIE:
-                    status = proc.status()
-                    logging.info(
-                        f'Renode process status: {status}'
-                    )
-                    time.sleep(.5)
-                    if time.perf_counter() - start_time > 30:
-                        logging.error(
-                            'Renode did not close properly after 30s'
-                        )
-                        break
 
-            logging.debug(f'Renode logs:\n{self.log_buffer}')
+        # pids are recorded parent first, signal children before parents
+        pids = reversed(list(dict.fromkeys(self.subprocess_pids)))
+        if self.renode_process is not None:
+            # Renode runs in its own session, so a single signal to its
+            # process group reaches all of its descendants
+            try:
+                logging.debug(
+                    f'sending SIGTERM to process group '
+                    f'{self.renode_process.pid}'
+                )
+                os.killpg(self.renode_process.pid, signal.SIGTERM)
+                pids = ()
+            except ProcessLookupError:
+                logging.debug('Renode process group not found')
+                pids = ()
+            except Exception as e:
+                logging.warning(
+                    f'could not kill process group, error: {e}'
+                )
 
-        for pid in set(self.subprocess_pids):
+        for pid in pids:
             try:
                 logging.debug(f'sending SIGTERM to process {pid}')
                 os.kill(pid, signal.SIGTERM)
@@ -200,13 +248,46 @@ class Pyrenode(metaclass=Singleton):
                 )
                 continue
 
+        if self.renode_process is not None:
+            # reap the process so it does not linger as a zombie
+            try:
+                self.renode_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                logging.warning(
+                    f'process {self.renode_process.pid} did not terminate, '
+                    'killing it'
+                )
+                self.renode_process.kill()
+                self.renode_process.wait()
+
+        if self.robot_connection is not None:
+            self.robot_connection.close()
+
+        if self.telnet_connection is not None:
+            self.telnet_connection.close()
+
         self.renode_process = None
         self.telnet_connection = None
+        self.telnet_buffer = bytearray()
+        self.telnet_partial = b''
         self.robot_connection = None
         self.keywords = []
+        self._keyword_set = frozenset()
         self.subprocess_pids = []
         self.renode_pid = None
 
+        if self.log_reader_thread is not None:
+            # wake the reader up, it has to finish before the pipe is closed
+            try:
+                os.write(self.log_reader_wakeup, b'\0')
+            except BrokenPipeError:
+                # the reader has already stopped at EOF
+                pass
+            self.log_reader_thread.join()
+            os.close(self.log_reader_wakeup)
+            self.log_reader_thread = None
+            self.log_reader_wakeup = None
+
         if (self.renode_pipe_in is not None and
                 not self.renode_pipe_in.closed):
             try:
@@ -227,12 +308,7 @@ class Pyrenode(metaclass=Singleton):
         self.renode_pipe_in = None
         self.renode_pipe_out = None
 
-        self.log_buffer = ''
-        self.log_reader_run = False
-
-        if self.log_reader_thread is not None:
-            self.log_reader_thread.join()
-            self.log_reader_thread = None
+        self.log_buffer = bytearray()
 
         self.initialized = False
         logging.info('cleanup done')
@@ -249,24 +325,30 @@ class Pyrenode(metaclass=Singleton):
         newline : bool
             Adds newline to command if True
         """
+        payload = command.encode()
         if newline:
-            command += '\n'
+            payload += b'\n'
 
         if self.telnet_connection is not None:
-            logging.debug(f'writing via telnet: "{command}"')
-            self.telnet_connection.write(f'{command}\n'.encode())
+            logging.debug('writing via telnet: "%s"', command)
+            # UTF-8 never contains 0xff (IAC), so commands do not need any
+            # telnet escaping
+            self.telnet_connection.sendall(payload)
         elif (self.renode_pipe_in is not None and
                 not self.renode_pipe_in.closed):
-            logging.debug(f'writing via stdin: "{command}"')
-            self.renode_pipe_in.write(f'{command}\n')
-            self.renode_pipe_in.flush()
+            logging.debug('writing via stdin: "%s"', command)
+            # the pipe is unbuffered, each write is a single syscall
+            view = memoryview(payload)
+            while view:
+                view = view[self.renode_pipe_in.write(view):]
         else:
             logging.error('no connection to Renode')
             raise ConnectionError('No connection to Renode')
 
     def read_from_renode(self) -> str:
         """
-        Reads from Renode stdout.
+        Reads from Renode stdout. Once the output grows past twice
+        LOG_BUFFER_SIZE, it is trimmed to its last LOG_BUFFER_SIZE bytes.
 
         Returns
         -------
@@ -274,13 +356,17 @@ class Pyrenode(metaclass=Singleton):
             Renode output
         """
         if self.renode_pipe_out is not None:
-            return self.log_buffer
+            # an incomplete UTF-8 sequence at the end is left out until the
+            # reader appends the rest of it
+            text, _ = codecs.utf_8_decode(self.log_buffer, 'replace', False)
+            return text
         else:
             raise ConnectionError('No connection to Renode')
 
     def read_from_telnet(self) -> str:
         """
-        Reads from Renode telnet.
+        Reads from Renode telnet. All data that is pending on the connection
+        is drained in one call, without waiting for more.
 
         Returns
         -------
@@ -288,10 +374,169 @@ class Pyrenode(metaclass=Singleton):
             Renode telnet output
         """
         if self.telnet_connection is not None:
-            return self.escape_ansi(self.telnet_connection.read_eager())
+            # take all data that is already available, without waiting
+            while self._receive_telnet(time.perf_counter()):
+                pass
+            data = bytes(self.telnet_buffer)
+            self.telnet_buffer.clear()
+            return self.escape_ansi_bytes(data).decode(errors='replace')
         else:
             raise TelnetUninitialized('No connection to Renode')
 
+    def expect_telnet(
+            self,
+            pattern: Pattern[bytes],
+            timeout: float = 15.,
+            newlines: Optional[int] = None
+            ) -> Tuple[Optional[Match[bytes]], bytes]:
+        """
+        Reads from Renode telnet until the pattern is matched or timeout
+        expires.
+
+        Data is received directly from the telnet socket into
+        `telnet_buffer`. If the number of line breaks in every match is
+        known, a match can only start in the last `newlines + 1` lines, so
+        after each receive the search resumes at the start of those lines
+        instead of rescanning the whole buffer. Otherwise the buffer is
+        searched from its start every time, as a match of an arbitrary
+        pattern can be longer than the pattern itself. Data following the
+        match is kept for subsequent reads.
+
+        Parameters
+        ----------
+        pattern : Pattern[bytes]
+            Compiled pattern to look for
+        timeout : float
+            Timeout in seconds
+        newlines : Optional[int]
+            Exact number of b'\\n' in every match of the pattern, None if
+            it is not known
+
+        Returns
+        -------
+        Tuple[Optional[Match[bytes]], bytes] :
+            Match object (None on timeout) and data read up to the end of
+            the match (all data read on timeout)
+        """
+        if self.telnet_connection is None:
+            raise TelnetUninitialized('No connection to Renode')
+
+        buffer = self.telnet_buffer
+
+        deadline = time.perf_counter() + timeout
+        scan_from = 0
+        while True:
+            match = pattern.search(buffer, scan_from)
+            if match is not None:
+                data = bytes(buffer[:match.end()])
+                del buffer[:match.end()]
+                # rematch on the immutable copy, as the buffer was modified
+                return pattern.search(data, match.start()), data
+
+            if newlines is not None:
+                # skip everything before the last newlines + 1 lines, the
+                # buffer only grows, so earlier data is not searched again
+                end = len(buffer)
+                for _ in range(newlines + 1):
+                    end = buffer.rfind(b'\n', scan_from, end)
+                    if end < 0:
+                        break
+                else:
+                    scan_from = end + 1
+
+            if not self._receive_telnet(deadline):
+                break
+
+        data = bytes(buffer)
+        buffer.clear()
+        return None, data
+
+    def read_telnet_until(
+            self,
+            expected: bytes,
+            timeout: float = 1.) -> bytes:
+        """
+        Reads from Renode telnet until the expected string is found or
+        timeout expires. Unlike `expect_telnet` it looks for a literal string,
+        without involving the regex engine.
+
+        Parameters
+        ----------
+        expected : bytes
+            String to look for
+        timeout : float
+            Timeout in seconds
+
+        Returns
+        -------
+        bytes :
+            Data read up to the end of the expected string (all data read on
+            timeout)
+        """
+        if self.telnet_connection is None:
+            raise TelnetUninitialized('No connection to Renode')
+
+        buffer = self.telnet_buffer
+
+        deadline = time.perf_counter() + timeout
+        pos = 0
+        while True:
+            index = buffer.find(expected, pos)
+            if index >= 0:
+                end = index + len(expected)
+                data = bytes(buffer[:end])
+                del buffer[:end]
+                return data
+
+            pos = max(0, len(buffer) - len(expected) + 1)
+
+            if not self._receive_telnet(deadline):
+                break
+
+        data = bytes(buffer)
+        buffer.clear()
+        return data
+
+    def _receive_telnet(self, deadline: float) -> bool:
+        """
+        Waits for data on the telnet socket and appends it to
+        `telnet_buffer`, with telnet commands removed.
+
+        Parameters
+        ----------
+        deadline : float
+            Time (as returned by `time.perf_counter`) after which waiting stops
+
+        Returns
+        -------
+        bool :
+            False if deadline passed or connection was closed
+        """
+        remaining = max(0., deadline - time.perf_counter())
+        sock = self.telnet_connection
+        readable, _, _ = select.select([sock], [], [], remaining)
+        if not readable:
+            return False
+        # take everything available, so verbose output is consumed in few
+        # iterations
+        chunk = sock.recv(65536)
+        if not chunk:
+            return False
+        if self.telnet_partial:
+            chunk = self.telnet_partial + chunk
+            self.telnet_partial = b''
+        if b'\xff' in chunk:
+            # Renode negotiates telnet options only when the connection is
+            # established, the commands are of no use here
+            chunk = _TELNET_COMMAND_RE.sub(b'', chunk)
+            # keep a command split between receives until the rest arrives
+            partial = _TELNET_PARTIAL_RE.search(chunk)
+            if partial is not None:
+                self.telnet_partial = chunk[partial.start():]
+                chunk = chunk[:partial.start()]
+        self.telnet_buffer += chunk
+        return True
+
     def run_robot_keyword(
             self,
             keyword: str,
@@ -316,13 +561,15 @@ class Pyrenode(metaclass=Singleton):
         """
         if self.robot_connection is None:
             raise RobotUninitialized('No Robot connection')
-        if keyword not in self.keywords:
+        if keyword not in self._keyword_set:
             raise ValueError('Invalid keyword')
 
-        keyword_args = list(args)
-        keyword_args.extend([f'{k}={v}' for k, v in kwargs.items()])
+        if kwargs:
+            keyword_args = [*args, *(f'{k}={v}' for k, v in kwargs.items())]
+        else:
+            keyword_args = list(args)
 
-        logging.debug(f'Running keyword: {keyword} {keyword_args}')
+        logging.debug('Running keyword: %s %s', keyword, keyword_args)
 
         return self.robot_connection.run_keyword(keyword, keyword_args, None)
 
@@ -347,13 +594,13 @@ class Pyrenode(metaclass=Singleton):
         renode_args = []
 
         if self.renode_path is not None:
-            if self.renode_path.is_file():
+            if os.access(self.renode_path, os.X_OK) and \
+                    self.renode_path.is_file():
                 renode_executable = str(self.renode_path)
         else:
-            if shutil.which('renode') is not None:
-                renode_executable = 'renode'
-            elif shutil.which('renode-run') is not None:
-                renode_executable = 'renode-run'
+            renode_executable = self._find_renode_executable()
+            if (renode_executable is not None and
+                    Path(renode_executable).name == 'renode-run'):
                 renode_args.extend([
                     'exec',
                     '--'
@@ -364,12 +611,15 @@ class Pyrenode(metaclass=Singleton):
 
         if self.telnet_port is None:
             pipe_in = os.pipe()
-            self.renode_pipe_in = os.fdopen(pipe_in[1], 'w')
+            self._enlarge_pipe(pipe_in[1])
+            self.renode_pipe_in = os.fdopen(pipe_in[1], 'wb', buffering=0)
 
         if self.read_renode_stdout:
             pipe_out = os.pipe()
-            os.set_blocking(pipe_out[0], False)
-            self.renode_pipe_out = os.fdopen(pipe_out[0], 'r')
+            self._enlarge_pipe(pipe_out[0])
+            # the reader thread reads the descriptor directly, a raw file
+            # object skips the buffering and decoding layers of text mode
+            self.renode_pipe_out = os.fdopen(pipe_out[0], 'rb', buffering=0)
 
         renode_args.extend([
             '--plain',
@@ -386,37 +636,100 @@ class Pyrenode(metaclass=Singleton):
                 '--console'
             )
 
-        self.renode_process = subprocess.Popen(
-            [
-                renode_executable,
-                *renode_args
-            ],
-            stdin=(pipe_in[0] if self.telnet_port is None
-                   else subprocess.DEVNULL),
-            stdout=(pipe_out[1] if self.read_renode_stdout
-                    else subprocess.DEVNULL)
-        )
+        # On Python 3.10+ Popen starts the child with vfork() on Linux, so the
+        # address space of this process is not copied, as long as no
+        # preexec_fn (or user/group change) is passed here
+        try:
+            self.renode_process = subprocess.Popen(
+                [
+                    renode_executable,
+                    *renode_args
+                ],
+                stdin=(pipe_in[0] if self.telnet_port is None
+                       else subprocess.DEVNULL),
+                stdout=(pipe_out[1] if self.read_renode_stdout
+                        else subprocess.DEVNULL),
+                start_new_session=True
+            )
+        finally:
+            # the child has its own copies, closing ours lets the log reader
+            # see EOF once Renode exits
+            if self.telnet_port is None:
+                os.close(pipe_in[0])
+            if self.read_renode_stdout:
+                os.close(pipe_out[1])
 
         self.subprocess_pids.append(self.renode_process.pid)
 
-        if renode_executable in ['renode', 'renode-run']:
-            if renode_executable == 'renode-run':
-                condition = lambda x : x.name() == 'renode'
-            elif renode_executable == 'renode':
+        self.log_buffer = bytearray()
+
+        # drain stdout from the start, so Renode does not stall on a full
+        # pipe while the startup below is in progress
+        if self.read_renode_stdout:
+            wakeup_read, self.log_reader_wakeup = os.pipe()
+
+            def read_renode_logs():
+                fd = self.renode_pipe_out.fileno()
+                # data is read into one preallocated buffer, instead of
+                # allocating a new 64 KiB bytes object for every read
+                chunk = bytearray(65536)
+                view = memoryview(chunk)
+                dropped = 0
+                with selectors.DefaultSelector() as selector:
+                    selector.register(fd, selectors.EVENT_READ)
+                    selector.register(wakeup_read, selectors.EVENT_READ)
+                    while True:
+                        # sleep until Renode writes or cleanup wakes us up
+                        events = selector.select()
+                        if any(key.fd == wakeup_read for key, _ in events):
+                            break
+                        size = os.readv(fd, [chunk])
+                        if not size:
+                            break
+                        # kept as raw bytes, decoded only when read
+                        self.log_buffer += view[:size]
+                        # keep only the newest output, trimming in batches
+                        # so the kept data is not moved on every read
+                        if len(self.log_buffer) > 2 * LOG_BUFFER_SIZE:
+                            dropped += len(self.log_buffer) - LOG_BUFFER_SIZE
+                            del self.log_buffer[:-LOG_BUFFER_SIZE]
+                            logging.warning(
+                                'Renode output exceeds the log buffer, '
+                                f'{dropped} oldest bytes dropped so far'
+                            )
+                os.close(wakeup_read)
+
+            self.log_reader_thread = threading.Thread(target=read_renode_logs)
+            self.log_reader_thread.start()
+
+            logging.debug('Log reader thread started')
+
+        # the executable found in PATH is resolved to its full path
+        renode_name = (Path(renode_executable).name
+                       if self.renode_path is None else None)
+        if renode_name in ['renode', 'renode-run']:
+            if renode_name == 'renode-run':
+                condition = lambda x : x[1] == 'renode'
+            elif renode_name == 'renode':
                 # First child
                 condition = lambda x : True
             else:
                 raise Exception("Illegal application flow. This code concerns only 'renode-run' and system wide installed application")
 
             def get_renode_process_pid(condition):
-                renode_run_process = psutil.Process(self.renode_process.pid)
-                children = renode_run_process.children(recursive=False)
+                children = self._get_children(self.renode_process.pid)
 
-                renode_process = next(
-                    ps for ps in children if condition(ps)
+                renode_pid = next(
+                    (child[0] for child in children if condition(child)),
+                    None
                 )
+                if renode_pid is None:
+                    raise ProcessLookupError(
+                        f'no Renode child of {self.renode_process.pid} yet, '
+                        f'children: {children}'
+                    )
 
-                return renode_process.pid
+                return renode_pid
 
             pid = self._retry_until_success(
                 get_renode_process_pid,
@@ -430,26 +743,6 @@ class Pyrenode(metaclass=Singleton):
         else:
             self.renode_pid = self.renode_process.pid
 
-        self.log_buffer = ''
-
-        if self.read_renode_stdout:
-            self.log_reader_run = True
-
-            def read_renode_logs():
-                while self.log_reader_run:
-                    try:
-                        r = self.renode_pipe_out.read()
-                        self.log_buffer += r
-                    except TypeError:
-                        # read raises TypeError when the buffer is empty
-                        pass
-                        time.sleep(.05)
-
-            self.log_reader_thread = threading.Thread(target=read_renode_logs)
-            self.log_reader_thread.start()
-
-            logging.debug('Log reader thread started')
-
         logging.info(f'Renode process started, pid: {self.renode_pid}')
 
     def _open_telnet(
@@ -468,19 +761,23 @@ class Pyrenode(metaclass=Singleton):
         """
         logging.info('opening telnet')
         self.telnet_connection = self._retry_until_success(
-            telnetlib.Telnet,
-            ['localhost', self.telnet_port],
+            socket.create_connection,
+            [('localhost', self.telnet_port)],
             {'timeout': .5},
             timeout=timeout,
             retry_time=retry_time
         )
+        # commands are short and interactive, do not let Nagle's algorithm
+        # delay them
+        self.telnet_connection.setsockopt(
+            socket.IPPROTO_TCP,
+            socket.TCP_NODELAY,
+            1
+        )
 
         # check if telnet is properly connected
-        _, matches, _ = self.telnet_connection.expect(
-            ['(monitor)'.encode()],
-            timeout=10
-        )
-        if matches is None:
+        data = self.read_telnet_until(MONITOR_PROMPT, timeout=10)
+        if not data.endswith(MONITOR_PROMPT):
             raise ConnectionError('Telnet connection error')
 
         logging.info('Telnet connected')
@@ -499,12 +796,26 @@ class Pyrenode(metaclass=Singleton):
         retry_time : float
             Time interval between subsequent tries
         """
+        # Robot Framework is heavy to import, load it only when needed
+        from pyrenode.remote import PersistentRemote
+
         logging.info('opening Robot connection')
         if self.robot_port == 0:
+            robot_port_file = (Path(tempfile.gettempdir()) /
+                               f'renode-{self.renode_pid}' /
+                               'robot_port')
+
+            # the inotify wait and the polling below share one timeout
+            deadline = time.perf_counter() + timeout
+
+            # wait for Renode to write the file, polling below handles
+            # platforms without inotify
+            try:
+                wait_for_file(robot_port_file, timeout)
+            except OSError as e:
+                logging.debug(f'cannot watch robot port file: {e}')
+
             def get_robot_port():
-                robot_port_file = (Path(tempfile.gettempdir()) /
-                                   f'renode-{self.renode_pid}' /
-                                   'robot_port')
                 if not robot_port_file.exists():
                     raise FileNotFoundError('Missing file with robot port')
 
@@ -518,14 +829,14 @@ class Pyrenode(metaclass=Singleton):
 
             robot_port = self._retry_until_success(
                 get_robot_port,
-                timeout=timeout,
+                timeout=max(0., deadline - time.perf_counter()),
                 retry_time=retry_time
             )
 
             self.robot_port = robot_port
 
         self.robot_connection = self._retry_until_success(
-            robot_remote.Remote,
+            PersistentRemote,
             func_kwargs={
                 'uri': f'http://0.0.0.0:{self.robot_port}'
             },
@@ -534,36 +845,232 @@ class Pyrenode(metaclass=Singleton):
         )
 
         self.keywords = self.robot_connection.get_keyword_names()
+        # used for validating keywords, the list keeps the server's order
+        self._keyword_set = frozenset(self.keywords)
 
         logging.info(f'Robot connected via port {self.robot_port}')
 
     @staticmethod
-    def escape_ansi(line):
-        ansi_escape = re.compile(r'(?:\x1B[@-_]|[\x80-\x9F])[0-?]*[ -/]*[@-~]')
-        return ansi_escape.sub('', line)
+    def escape_ansi(line: str) -> str:
+        """
+        Removes ANSI escape sequences from text.
+
+        Parameters
+        ----------
+        line : str
+            Text to be processed
+
+        Returns
+        -------
+        str :
+            Text without escape sequences
+        """
+        # ESC is the only ASCII character that can start an escape sequence,
+        # so plain ASCII output can skip the regex entirely
+        if '\x1b' not in line and line.isascii():
+            return line
+        return _ANSI_ESCAPE_RE.sub('', line)
+
+    @staticmethod
+    def escape_ansi_bytes(data: bytes) -> bytes:
+        """
+        Removes ANSI escape sequences from UTF-8 encoded data, so it does not
+        have to be decoded first.
+
+        Parameters
+        ----------
+        data : bytes
+            UTF-8 encoded text to be processed
+
+        Returns
+        -------
+        bytes :
+            Data without escape sequences
+        """
+        # sequences start either with ESC or with an encoded C1 control
+        if b'\x1b' not in data and b'\xc2' not in data:
+            return data
+        return _ANSI_ESCAPE_BYTES_RE.sub(b'', data)
+
+    @classmethod
+    def _find_renode_executable(cls) -> Optional[str]:
+        """
+        Looks up Renode in PATH, preferring `renode` over `renode-run`. Both
+        names are checked in a single walk over PATH and the result is cached
+        until PATH changes.
+
+        Returns
+        -------
+        Optional[str] :
+            Full path to the executable, or None if neither is found
+        """
+        path_env = os.environ.get('PATH', os.defpath)
+        cached_path_env, cached_executable = cls._cached_executable
+        if cached_executable is not None and cached_path_env == path_env:
+            return cached_executable
+
+        renode_run = None
+        for directory in path_env.split(os.pathsep):
+            candidate = os.path.join(directory or os.curdir, 'renode')
+            if os.access(candidate, os.X_OK) and os.path.isfile(candidate):
+                executable = candidate
+                break
+            if renode_run is None:
+                candidate = os.path.join(directory or os.curdir, 'renode-run')
+                if (os.access(candidate, os.X_OK) and
+                        os.path.isfile(candidate)):
+                    renode_run = candidate
+        else:
+            executable = renode_run
+
+        cls._cached_executable = (path_env, executable)
+        return executable
+
+    @staticmethod
+    def _enlarge_pipe(fd: int, size: int = PIPE_SIZE):
+        """
+        Enlarges the kernel buffer of the pipe, so the writer is not blocked
+        while the reader is busy. The size is capped at the system limit for
+        unprivileged processes. Only supported on Linux, elsewhere the
+        default size is kept.
+
+        Parameters
+        ----------
+        fd : int
+            File descriptor of either end of the pipe
+        size : int
+            Requested buffer size in bytes
+        """
+        try:
+            import fcntl
+            try:
+                with open('/proc/sys/fs/pipe-max-size') as f:
+                    size = min(size, int(f.read()))
+            except (OSError, ValueError):
+                pass
+            fcntl.fcntl(fd, getattr(fcntl, 'F_SETPIPE_SZ', 1031), size)
+        except (ImportError, OSError) as e:
+            logging.debug(f'cannot change pipe size: {e}')
+
+    @staticmethod
+    def _get_children(pid: int) -> List[Tuple[int, str]]:
+        """
+        Lists direct children of the process. Where the kernel provides
+        /proc/<pid>/task/<tid>/children (CONFIG_PROC_CHILDREN), they are read
+        from it, which avoids scanning the whole process table, elsewhere
+        psutil is used.
+
+        Parameters
+        ----------
+        pid : int
+            PID of the parent process
+
+        Returns
+        -------
+        List[Tuple[int, str]] :
+            PIDs and names of the child processes
+        """
+        # the main thread's task id is the pid of this process
+        if not os.path.exists(f'/proc/self/task/{os.getpid()}/children'):
+            import psutil
+            return [
+                (child.pid, child.name())
+                for child in psutil.Process(pid).children(recursive=False)
+            ]
+
+        children = []
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            try:
+                with open(f'/proc/{pid}/task/{tid}/children', 'r') as f:
+                    child_pids = f.read().split()
+            except FileNotFoundError:
+                # thread already exited
+                continue
+            for child_pid in child_pids:
+                try:
+                    with open(f'/proc/{child_pid}/comm', 'r') as f:
+                        name = f.read().rstrip('\n')
+                except FileNotFoundError:
+                    # child already exited
+                    continue
+                children.append((int(child_pid), name))
+        return children
+
+    @staticmethod
+    def _wait_for_exit(
+            process: subprocess.Popen,
+            timeout: float) -> bool:
+        """
+        Waits for the process to exit. On Linux the wait is a single poll on
+        a pidfd, which wakes up exactly when the process exits, otherwise
+        Popen.wait is used.
+
+        Parameters
+        ----------
+        process : subprocess.Popen
+            Process to wait for
+        timeout : float
+            Timeout in seconds
+
+        Returns
+        -------
+        bool :
+            True if the process exited, False on timeout
+        """
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except (AttributeError, OSError):
+            # no pidfd support (Python < 3.9, non-Linux or kernel < 5.3) or
+            # the process is already reaped
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return False
+            return True
+
+        try:
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            if not poller.poll(timeout * 1000):
+                return False
+        finally:
+            os.close(pidfd)
+
+        # reap the exited process
+        process.wait()
+        return True
 
     @staticmethod
     def _retry_until_success(
             func,
-            func_args: List[Any] = [],
-            func_kwargs: Dict[str, Any] = {},
+            func_args: Optional[List[Any]] = None,
+            func_kwargs: Optional[Dict[str, Any]] = None,
             timeout: float = 10.,
             retry_time: float = 1) -> Any:
-        retries = int(timeout / retry_time)
-        assert retries >= 0
+        assert timeout >= 0
+        if func_args is None:
+            func_args = []
+        if func_kwargs is None:
+            func_kwargs = {}
+        deadline = time.perf_counter() + timeout
+        # the awaited resource is usually ready shortly after the first
+        # attempt, so start with short sleeps and back off to retry_time
+        delay = min(.01, retry_time)
 
         while True:
             try:
                 return func(*func_args, **func_kwargs)
             except Exception as e:
-                retries -= 1
-                if retries < 0:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
                     logging.error(
                         f'{func.__name__} failed: {e}'
                     )
                     raise
                 else:
                     logging.debug(
-                        f'{func.__name__} failed: {e}, retries left: {retries}'
+                        f'{func.__name__} failed: {e}, '
+                        f'time left: {remaining:.2f}s'
                     )
-                time.sleep(retry_time)
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, retry_time)
@@ -0,0 +1,98 @@
+import socket
+import xmlrpc.client
+import robot.libraries.Remote as robot_remote
+from contextlib import contextmanager
+
+
+class _BuiltinTypesTransportMixin:
+    """
+    Initializes a Robot timeout transport so it unmarshals into builtin
+    types (`bytes` and `datetime`), which Robot transports do not pass to
+    xmlrpc.client.Transport.
+    """
+
+    def __init__(self, use_datetime: bool = False, timeout: float = None):
+        xmlrpc.client.Transport.__init__(
+            self,
+            use_datetime,
+            use_builtin_types=True
+        )
+        if not timeout:
+            timeout = socket._GLOBAL_DEFAULT_TIMEOUT
+        self.timeout = timeout
+
+
+class BuiltinTypesHTTPTransport(
+        _BuiltinTypesTransportMixin,
+        robot_remote.TimeoutHTTPTransport):
+    """
+    Robot HTTP transport unmarshalling into builtin types.
+    """
+
+
+class BuiltinTypesHTTPSTransport(
+        _BuiltinTypesTransportMixin,
+        robot_remote.TimeoutHTTPSTransport):
+    """
+    Robot HTTPS transport unmarshalling into builtin types.
+    """
+
+
+class PersistentXmlRpcRemoteClient(robot_remote.XmlRpcRemoteClient):
+    """
+    XML-RPC client that reuses a single ServerProxy, and therefore a single
+    HTTP connection, for all calls instead of creating a new one per call.
+
+    Binary values are unmarshalled straight into `bytes` (and dates into
+    `datetime`) rather than into intermediate xmlrpc.client wrappers.
+    """
+
+    def __init__(self, uri: str, timeout: float = None):
+        super().__init__(uri, timeout)
+        self._proxy = None
+
+    @property
+    @contextmanager
+    def _server(self):
+        if self._proxy is None:
+            if self.uri.startswith('https://'):
+                transport = BuiltinTypesHTTPSTransport(timeout=self.timeout)
+            else:
+                transport = BuiltinTypesHTTPTransport(timeout=self.timeout)
+            self._proxy = xmlrpc.client.ServerProxy(
+                self.uri,
+                encoding='UTF-8',
+                transport=transport
+            )
+        try:
+            yield self._proxy
+        except (socket.error, xmlrpc.client.Error) as err:
+            self.close()
+            raise TypeError(err)
+
+    def close(self):
+        """
+        Closes the underlying HTTP connection.
+        """
+        if self._proxy is not None:
+            self._proxy('close')()
+            self._proxy = None
+
+
+class PersistentRemote(robot_remote.Remote):
+    """
+    Robot Remote library using a persistent HTTP connection to the server.
+    """
+
+    def __init__(self, uri: str = 'http://127.0.0.1:8270', timeout=None):
+        super().__init__(uri, timeout)
+        self._client = PersistentXmlRpcRemoteClient(
+            self._client.uri,
+            self._client.timeout
+        )
+
+    def close(self):
+        """
+        Closes connection to the Robot server.
+        """
+        self._client.close()